@@ -1,15 +1,22 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 
 connect_args = {}
+engine_kwargs = {}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args["check_same_thread"] = False
+    if settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+        # An in-memory database lives in its connection, so share one
+        # connection across threads instead of one database per thread
+        engine_kwargs["poolclass"] = StaticPool
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     connect_args=connect_args,
+    **engine_kwargs,
 )
 
 # Enable WAL mode and foreign keys for SQLite
@@ -3,9 +3,10 @@ Models for Google Classroom integration (Level 2).
 
 GoogleAccount stores OAuth tokens for teachers who have connected their Google account.
 GoogleClassroomLink tracks assignments that have been posted to Google Classroom.
+CourseImportJob tracks a background import of a teacher's Classroom courses.
 """
 import uuid
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, UniqueConstraint, JSON
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -44,3 +45,17 @@ class GoogleClassroomLink(Base):
         UniqueConstraint("assignment_id", "classroom_course_id",
                          name="uq_assignment_course"),
     )
+
+
+class CourseImportJob(Base):
+    """A background import of a teacher's Google Classroom courses."""
+    __tablename__ = "course_import_jobs"
+
+    id = Column(String(36), primary_key=True, default=gen_uuid)
+    teacher_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending|running|completed|failed
+    results = Column(JSON, nullable=True)                  # import_courses() output
+    error = Column(Text, nullable=True)
+    # Timezone-aware so the stalled-job check doesn't depend on the server's TimeZone
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
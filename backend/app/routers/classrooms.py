@@ -1,5 +1,6 @@
-import random, string
+import base64, secrets
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
@@ -13,8 +14,9 @@ router = APIRouter(prefix="/api/classrooms", tags=["classrooms"])
 
 def _generate_class_code(db: Session) -> str:
     while True:
-        code = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        if not db.query(Classroom).filter(Classroom.class_code == code).first():
+        code = base64.b32encode(secrets.token_bytes(4)).decode()[:6]
+        taken = db.scalar(select(exists().where(Classroom.class_code == code)))
+        if not taken:
             return code
 
 
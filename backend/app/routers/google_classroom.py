@@ -7,7 +7,7 @@ import logging
 from typing import Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -143,25 +143,33 @@ def post_assignment(
 
 @router.post("/classroom/import-courses")
 def import_courses(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     teacher: User = Depends(require_teacher),
 ):
-    """Import Google Classroom courses as NumberSense classes.
+    """Start importing Google Classroom courses as NumberSense classes.
 
-    Skips courses that have already been imported. Can be called
-    multiple times safely to pick up newly created courses.
+    Large imports can take minutes, so the work runs in the background and
+    this returns a job id immediately; poll /classroom/import-jobs/{job_id}
+    for the results. Skips courses that have already been imported. Can be
+    called multiple times safely to pick up newly created courses.
     """
-    try:
-        results = google_classroom_service.import_courses(db, teacher.id)
-    except ValueError as exc:
-        raise HTTPException(status_code=401, detail=str(exc))
-    except Exception as exc:
-        logger.error("Failed to import courses for teacher %s: %s", teacher.id, exc)
-        raise HTTPException(
-            status_code=502,
-            detail="Could not import courses from Google Classroom. Please try again.",
-        )
-    return {"courses": results}
+    job = google_classroom_service.create_import_job(db, teacher.id)
+    background_tasks.add_task(google_classroom_service.run_import_job, job.id)
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/classroom/import-jobs/{job_id}")
+def get_import_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    teacher: User = Depends(require_teacher),
+):
+    """Get the status (and, once finished, the results) of a course import."""
+    job = google_classroom_service.get_import_job(db, job_id, teacher.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
 
 @router.get("/classroom/assignment-links/{assignment_id}")
@@ -191,14 +191,15 @@ def get_next_problem(
     gen_config["visual_support_level"] = vis_level
 
     if skill.problem_type == "multiplication_facts":
-        prev_attempts = (
-            db.query(StudentAttempt)
+        # Only the stored problem data is needed, not whole attempt rows
+        prev_problems = (
+            db.query(StudentAttempt.problem_data)
             .filter(StudentAttempt.session_id == session.id)
             .all()
         )
         seen_facts = set()
-        for pa in prev_attempts:
-            factors = (pa.problem_data or {}).get("factors")
+        for (problem_data,) in prev_problems:
+            factors = (problem_data or {}).get("factors")
             if factors and len(factors) == 2:
                 seen_facts.add((min(factors[0], factors[1]),
                                 max(factors[0], factors[1])))
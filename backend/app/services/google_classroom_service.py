@@ -3,24 +3,33 @@ Google Classroom API service for Level 2 integration.
 
 Responsibilities:
   - Fetch teacher's Classroom courses
-  - Import Classroom courses as NumberSense classrooms
+  - Import Classroom courses as NumberSense classrooms (in the background)
   - Post a NumberSense assignment as Classroom coursework
   - Prevent duplicate posts for the same assignment + course
 
 All calls are logged for observability.
 """
+import base64
 import logging
-import random
-import string
-from typing import List, Optional
-from datetime import datetime
-
-from googleapiclient.discovery import build
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.database import SessionLocal
 from app.core.security import hash_password
-from app.models.google_classroom import GoogleClassroomLink
+from app.models.google_classroom import CourseImportJob, GoogleClassroomLink
 from app.models.classroom import Classroom, ClassEnrollment
 from app.models.assignment import Assignment
 from app.models.user import User
@@ -30,25 +39,50 @@ from app.services.google_auth_service import get_credentials
 logger = logging.getLogger("numbersense.google_classroom")
 
 
+# Concurrent roster fetches during import_courses
+_ROSTER_FETCH_WORKERS = 8
+# Socket timeout for Classroom API calls
+_HTTP_TIMEOUT_SECONDS = 30
+# Retries (with backoff) for idempotent read calls; writes are never retried
+_READ_RETRIES = 3
+# A pending/running import job with no progress for this long is presumed
+# dead (e.g. the API process restarted mid-import) and reported as failed
+_IMPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+
+
+@lru_cache(maxsize=1)
+def _discovery_document() -> str:
+    """Return the Classroom v1 discovery document bundled with
+    google-api-python-client (shipped by every version we pin)."""
+    return discovery_cache.get_static_doc("classroom", "v1")
+
+
+def _service_for(creds):
+    """Build a Google Classroom API service from resolved credentials.
+
+    The service owns a single keep-alive httplib2 connection pool, so every
+    request made through it reuses the same TLS connection. The discovery
+    document is loaded once per process instead of on every build.
+    """
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=_HTTP_TIMEOUT_SECONDS))
+    return build_from_document(_discovery_document(), http=http)
+
+
 def _build_service(db: Session, teacher_id: str):
     """Build a Google Classroom API service using the teacher's credentials."""
-    creds = get_credentials(db, teacher_id)
-    return build("classroom", "v1", credentials=creds, cache_discovery=False)
+    return _service_for(get_credentials(db, teacher_id))
 
 
 # ---------------------------------------------------------------------------
 # Fetch courses
 # ---------------------------------------------------------------------------
 
-def list_courses(db: Session, teacher_id: str, *, _service=None) -> List[dict]:
-    """Return a list of the teacher's active Google Classroom courses.
+def iter_courses(service) -> Iterator[dict]:
+    """Yield the teacher's active Google Classroom courses page by page.
 
-    Each item has: id, name, section, descriptionHeading.
+    Each course is yielded as soon as its page arrives, so callers can
+    start per-course work while the next page is still in flight.
     """
-    service = _service or _build_service(db, teacher_id)
-    logger.info("Fetching Classroom courses for teacher %s", teacher_id)
-
-    courses = []
     page_token = None
     while True:
         resp = service.courses().list(
@@ -56,20 +90,31 @@ def list_courses(db: Session, teacher_id: str, *, _service=None) -> List[dict]:
             courseStates=["ACTIVE"],
             pageSize=50,
             pageToken=page_token,
-        ).execute()
+        ).execute(num_retries=_READ_RETRIES)
 
         for c in resp.get("courses", []):
-            courses.append({
+            yield {
                 "id": c["id"],
                 "name": c.get("name", ""),
                 "section": c.get("section", ""),
                 "description_heading": c.get("descriptionHeading", ""),
-            })
+            }
 
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
 
+
+def list_courses(db: Session, teacher_id: str, *, _service=None) -> List[dict]:
+    """Return a list of the teacher's active Google Classroom courses.
+
+    Each item has: id, name, section, descriptionHeading.
+    """
+    service = _service or _build_service(db, teacher_id)
+    logger.info("Fetching Classroom courses for teacher %s", teacher_id)
+
+    courses = list(iter_courses(service))
+
     logger.info("Found %d active courses for teacher %s", len(courses), teacher_id)
     return courses
 
@@ -90,16 +135,6 @@ def post_assignment(
     Returns a dict with the created coursework details.
     Raises ValueError on duplicate or missing data.
     """
-    # Check for duplicate
-    existing = db.query(GoogleClassroomLink).filter(
-        GoogleClassroomLink.assignment_id == assignment_id,
-        GoogleClassroomLink.classroom_course_id == course_id,
-    ).first()
-    if existing:
-        raise ValueError(
-            "This assignment has already been posted to this Google Classroom course."
-        )
-
     # Look up the NumberSense assignment + skill
     assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
     if not assignment:
@@ -112,8 +147,7 @@ def post_assignment(
     share_token = assignment.share_token
     if not share_token:
         # Backfill share_token if missing
-        import secrets as _secrets
-        share_token = _secrets.token_urlsafe(16)
+        share_token = secrets.token_urlsafe(16)
         assignment.share_token = share_token
         db.flush()
 
@@ -145,8 +179,25 @@ def post_assignment(
             "minutes": 59,
         }
 
-    # Post to Google Classroom
     service = _build_service(db, teacher_id)
+
+    # Reserve the (assignment, course) pair before calling Google. The
+    # unique constraint makes a concurrent duplicate post fail here rather
+    # than creating a second coursework item.
+    link = GoogleClassroomLink(
+        assignment_id=assignment_id,
+        classroom_course_id=course_id,
+        classroom_coursework_id="",
+    )
+    try:
+        with db.begin_nested():
+            db.add(link)
+    except IntegrityError:
+        raise ValueError(
+            "This assignment has already been posted to this Google Classroom course."
+        )
+
+    # Post to Google Classroom
     logger.info(
         "Posting assignment %s to Classroom course %s (teacher %s)",
         assignment_id, course_id, teacher_id,
@@ -158,6 +209,7 @@ def post_assignment(
             body=coursework_body,
         ).execute()
     except Exception as exc:
+        db.rollback()
         logger.error(
             "Failed to post assignment %s to course %s: %s",
             assignment_id, course_id, exc,
@@ -168,22 +220,25 @@ def post_assignment(
 
     coursework_id = coursework["id"]
 
-    # Get course name for display
-    course_name = ""
-    try:
-        course = service.courses().get(id=course_id).execute()
-        course_name = course.get("name", "")
-    except Exception:
-        pass
-
-    # Store the link
-    link = GoogleClassroomLink(
-        assignment_id=assignment_id,
-        classroom_course_id=course_id,
-        classroom_coursework_id=coursework_id,
-        course_name=course_name,
-    )
-    db.add(link)
+    # Get course name for display, preferring the imported classroom's name.
+    # Either way it's the "Name — Section" form import_courses gives classes,
+    # so teachers can tell sections of the same course apart.
+    local_class = db.query(Classroom.name).filter(
+        Classroom.google_course_id == course_id
+    ).first()
+    course_name = local_class[0] if local_class else ""
+    if not course_name:
+        try:
+            course = service.courses().get(
+                id=course_id, fields="name,section",
+            ).execute(num_retries=_READ_RETRIES)
+            course_name = _course_display_name(course)
+        except Exception:
+            pass
+
+    # Fill in the reserved link
+    link.classroom_coursework_id = coursework_id
+    link.course_name = course_name
     db.commit()
     db.refresh(link)
 
@@ -222,11 +277,25 @@ def get_links_for_assignment(db: Session, assignment_id: str) -> List[dict]:
 # Import courses as NumberSense classrooms
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
+def _default_student_password_hash() -> str:
+    """Hash the shared default student password once per process.
+
+    Imported students sign in with the class code, so every account can
+    share the same hash; bcrypt is far too slow to rerun per student.
+    """
+    return hash_password("student")
+
+
 def _generate_class_code(db: Session) -> str:
-    """Generate a unique 6-character class code."""
+    """Generate a unique 6-character class code.
+
+    Codes are drawn from the base32 alphabet (A-Z, 2-7) using a CSPRNG.
+    """
     while True:
-        code = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        if not db.query(Classroom).filter(Classroom.class_code == code).first():
+        code = base64.b32encode(secrets.token_bytes(4)).decode()[:6]
+        taken = db.scalar(select(exists().where(Classroom.class_code == code)))
+        if not taken:
             return code
 
 
@@ -243,7 +312,7 @@ def _fetch_roster(service, course_id: str) -> List[dict]:
                 courseId=course_id,
                 pageSize=100,
                 pageToken=page_token,
-            ).execute()
+            ).execute(num_retries=_READ_RETRIES)
         except Exception as exc:
             logger.warning("Failed to fetch roster for course %s: %s", course_id, exc)
             break
@@ -271,36 +340,52 @@ def _enroll_students(db: Session, classroom_id: str, roster: List[dict]) -> int:
     - Matches existing users by username (first.last) to avoid duplicates.
     - Students get a default password of 'student' (they use class code login).
     - Returns the number of newly enrolled students.
-    """
-    enrolled_count = 0
 
-    for s in roster:
-        first = s.get("first_name", "").strip()
-        last = s.get("last_name", "").strip()
-        if not first or not last:
-            continue
-
-        username = f"{first.lower()}.{last.lower()}"
+    Users and enrollments are looked up with one IN query each rather than
+    one pair of queries per student.
+    """
+    # (first, last, username) for every named student, in roster order
+    names = [
+        (first, last, f"{first.lower()}.{last.lower()}")
+        for first, last in (
+            (s.get("first_name", "").strip(), s.get("last_name", "").strip())
+            for s in roster
+        )
+        if first and last
+    ]
+    if not names:
+        return 0
 
-        # Find or create user
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
-            user = User(
+    # Find or create users
+    users = {
+        u.username: u
+        for u in db.query(User).filter(User.username.in_({n[2] for n in names}))
+    }
+    for first, last, username in names:
+        if username not in users:
+            users[username] = User(
                 first_name=first,
                 last_name=last,
                 username=username,
-                hashed_password=hash_password("student"),
+                hashed_password=_default_student_password_hash(),
                 role="student",
             )
-            db.add(user)
-            db.flush()
-
-        # Check if already enrolled
-        existing_enrollment = db.query(ClassEnrollment).filter(
+            db.add(users[username])
+    db.flush()
+
+    # Enroll each distinct student once
+    students = list({users[n[2]].id: users[n[2]] for n in names}.values())
+    enrollments = {
+        e.student_id: e
+        for e in db.query(ClassEnrollment).filter(
             ClassEnrollment.classroom_id == classroom_id,
-            ClassEnrollment.student_id == user.id,
-        ).first()
+            ClassEnrollment.student_id.in_([u.id for u in students]),
+        )
+    }
 
+    enrolled_count = 0
+    for user in students:
+        existing_enrollment = enrollments.get(user.id)
         if existing_enrollment:
             if not existing_enrollment.is_active:
                 existing_enrollment.is_active = True
@@ -312,86 +397,245 @@ def _enroll_students(db: Session, classroom_id: str, roster: List[dict]) -> int:
             ))
             enrolled_count += 1
 
+    # Flush once so callers (e.g. the student count) see the new enrollments
+    db.flush()
     return enrolled_count
 
 
-def import_courses(db: Session, teacher_id: str) -> List[dict]:
+def _course_display_name(course: dict) -> str:
+    """A Classroom course's name, qualified by its section if it has one."""
+    name = course.get("name", "")
+    section = course.get("section", "")
+    return f"{name} — {section}" if section else name
+
+
+def import_courses(
+    db: Session,
+    teacher_id: str,
+    on_progress: Optional[Callable[[List[dict]], None]] = None,
+) -> List[dict]:
     """Fetch Google Classroom courses, create NumberSense classrooms, and
     import student rosters.
 
     Skips courses that have already been imported (matched by google_course_id),
     but still syncs their rosters to pick up new students.
     Returns a list of dicts describing each imported or existing classroom.
+    If given, on_progress is called with the results so far after each course.
+
+    Rosters are fetched on a thread pool as soon as each course is listed,
+    overlapping course pagination with roster requests. Each worker thread
+    builds its own API client (googleapiclient is not thread-safe) and all
+    database work stays on the calling thread.
     """
-    service = _build_service(db, teacher_id)
-    google_courses = list_courses(db, teacher_id, _service=service)
-    results = []
-
-    for gc in google_courses:
-        course_id = gc["id"]
-        course_name = gc["name"]
-        section = gc.get("section", "")
-        display_name = f"{course_name} — {section}" if section else course_name
-
-        # Check if already imported
-        existing = db.query(Classroom).filter(
-            Classroom.google_course_id == course_id
-        ).first()
-
-        if existing:
-            # Still sync roster for existing classrooms
-            roster = _fetch_roster(service, course_id)
-            new_students = _enroll_students(db, existing.id, roster)
-
-            student_count = (
-                db.query(ClassEnrollment)
-                .filter(ClassEnrollment.classroom_id == existing.id,
-                        ClassEnrollment.is_active == True)
-                .count()
+    creds = get_credentials(db, teacher_id)
+    service = _service_for(creds)
+    worker_state = threading.local()
+
+    def fetch_roster(course_id: str) -> List[dict]:
+        worker_service = getattr(worker_state, "service", None)
+        if worker_service is None:
+            worker_service = worker_state.service = _service_for(creds)
+        return _fetch_roster(worker_service, course_id)
+
+    logger.info("Fetching Classroom courses for teacher %s", teacher_id)
+    with ThreadPoolExecutor(max_workers=_ROSTER_FETCH_WORKERS) as pool:
+        pending = [
+            (gc, pool.submit(fetch_roster, gc["id"]))
+            for gc in iter_courses(service)
+        ]
+        logger.info("Found %d active courses for teacher %s", len(pending), teacher_id)
+
+        results = []
+
+        def record(result: dict) -> None:
+            results.append(result)
+            if on_progress:
+                on_progress(results)
+
+        for gc, roster_future in pending:
+            course_id = gc["id"]
+            display_name = _course_display_name(gc)
+
+            # Check if already imported
+            existing = db.query(Classroom).filter(
+                Classroom.google_course_id == course_id
+            ).first()
+
+            if existing:
+                # Still sync roster for existing classrooms
+                roster = roster_future.result()
+                with db.no_autoflush:
+                    new_students = _enroll_students(db, existing.id, roster)
+
+                student_count = db.scalar(
+                    select(func.count())
+                    .select_from(ClassEnrollment)
+                    .where(ClassEnrollment.classroom_id == existing.id,
+                           ClassEnrollment.is_active == True)
+                )
+                if new_students > 0:
+                    logger.info("Synced %d new students into existing class %s",
+                                new_students, existing.name)
+
+                record({
+                    "id": existing.id,
+                    "name": existing.name,
+                    "class_code": existing.class_code,
+                    "google_course_id": course_id,
+                    "status": "already_imported",
+                    "student_count": student_count,
+                    "new_students": new_students,
+                })
+                continue
+
+            # Create new classroom
+            classroom = Classroom(
+                name=display_name,
+                class_code=_generate_class_code(db),
+                teacher_id=teacher_id,
+                google_course_id=course_id,
             )
-            if new_students > 0:
-                logger.info("Synced %d new students into existing class %s",
-                            new_students, existing.name)
-
-            results.append({
-                "id": existing.id,
-                "name": existing.name,
-                "class_code": existing.class_code,
+            db.add(classroom)
+            db.flush()
+
+            # Import roster
+            roster = roster_future.result()
+            with db.no_autoflush:
+                new_students = _enroll_students(db, classroom.id, roster)
+
+            logger.info(
+                "Imported course '%s' (id=%s) with %d students for teacher %s",
+                display_name, course_id, new_students, teacher_id,
+            )
+
+            record({
+                "id": classroom.id,
+                "name": classroom.name,
+                "class_code": classroom.class_code,
                 "google_course_id": course_id,
-                "status": "already_imported",
-                "student_count": student_count,
+                "status": "imported",
+                "student_count": new_students,
                 "new_students": new_students,
             })
-            continue
-
-        # Create new classroom
-        classroom = Classroom(
-            name=display_name,
-            class_code=_generate_class_code(db),
-            teacher_id=teacher_id,
-            google_course_id=course_id,
-        )
-        db.add(classroom)
-        db.flush()
 
-        # Import roster
-        roster = _fetch_roster(service, course_id)
-        new_students = _enroll_students(db, classroom.id, roster)
+    db.commit()
+    return results
 
-        logger.info(
-            "Imported course '%s' (id=%s) with %d students for teacher %s",
-            display_name, course_id, new_students, teacher_id,
-        )
 
-        results.append({
-            "id": classroom.id,
-            "name": classroom.name,
-            "class_code": classroom.class_code,
-            "google_course_id": course_id,
-            "status": "imported",
-            "student_count": new_students,
-            "new_students": new_students,
-        })
+# ---------------------------------------------------------------------------
+# Background import jobs
+# ---------------------------------------------------------------------------
+
+_STALLED_IMPORT_ERROR = "The import was interrupted. Please try syncing again."
+
+
+def _is_stalled(job: CourseImportJob) -> bool:
+    """True if a pending/running job has shown no activity for too long.
+
+    The timestamps are timezone-aware columns; SQLite hands them back naive,
+    but always in UTC (CURRENT_TIMESTAMP).
+    """
+    if job.status not in ("pending", "running"):
+        return False
+    last_activity = job.updated_at or job.created_at
+    if last_activity is None:
+        return False
+    if last_activity.tzinfo is None:
+        last_activity = last_activity.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - last_activity > _IMPORT_JOB_STALE_AFTER
+
 
+def create_import_job(db: Session, teacher_id: str) -> CourseImportJob:
+    """Record a pending course import for the teacher.
+
+    Any of the teacher's earlier jobs that stalled (see _is_stalled) are
+    marked failed here, so abandoned jobs don't linger as running.
+    """
+    for stalled in db.query(CourseImportJob).filter(
+        CourseImportJob.teacher_id == teacher_id,
+        CourseImportJob.status.in_(("pending", "running")),
+    ):
+        if _is_stalled(stalled):
+            logger.warning("Course import job %s stalled while %s; marking failed",
+                           stalled.id, stalled.status)
+            stalled.status = "failed"
+            stalled.error = _STALLED_IMPORT_ERROR
+
+    job = CourseImportJob(teacher_id=teacher_id, status="pending")
+    db.add(job)
     db.commit()
-    return results
+    db.refresh(job)
+    return job
+
+
+def run_import_job(job_id: str, *, _session_factory=SessionLocal) -> None:
+    """Run import_courses for a job, recording its outcome on the job row.
+
+    Runs after the response has been sent, so it opens its own session
+    rather than borrowing the request's. Results are committed to the job
+    after each course, so pollers can show progress and a partial import
+    survives a failure (re-running the import picks up where it stopped).
+
+    The job runs inside the API process and does not survive a restart;
+    get_import_job reports such abandoned jobs as failed.
+    """
+    db = _session_factory()
+    try:
+        job = db.get(CourseImportJob, job_id)
+        if not job:
+            logger.warning("Course import job %s not found", job_id)
+            return
+        teacher_id = job.teacher_id
+        job.status = "running"
+        db.commit()
+
+        def save_progress(results: List[dict]) -> None:
+            job.results = list(results)
+            db.commit()
+
+        try:
+            results = import_courses(db, teacher_id, on_progress=save_progress)
+        except Exception as exc:
+            db.rollback()
+            logger.error("Course import job %s failed for teacher %s: %s",
+                         job_id, teacher_id, exc)
+            job = db.get(CourseImportJob, job_id)
+            job.status = "failed"
+            job.error = str(exc) if isinstance(exc, ValueError) else (
+                "Could not import courses from Google Classroom. Please try again."
+            )
+        else:
+            job.status = "completed"
+            job.results = results
+            logger.info("Course import job %s completed for teacher %s (%d courses)",
+                        job_id, teacher_id, len(results))
+        db.commit()
+    finally:
+        db.close()
+
+
+def get_import_job(db: Session, job_id: str, teacher_id: str) -> Optional[dict]:
+    """Return a teacher's import job as a dict, or None if it doesn't exist.
+
+    A stalled job is reported as failed; its row is updated the next time
+    the teacher starts an import.
+    """
+    job = db.query(CourseImportJob).filter(
+        CourseImportJob.id == job_id,
+        CourseImportJob.teacher_id == teacher_id,
+    ).first()
+    if not job:
+        return None
+    if _is_stalled(job):
+        return {
+            "job_id": job.id,
+            "status": "failed",
+            "courses": job.results or [],
+            "error": _STALLED_IMPORT_ERROR,
+        }
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "courses": job.results or [],
+        "error": job.error,
+    }
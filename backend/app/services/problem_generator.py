@@ -3,200 +3,243 @@ Problem generation engine for all three math domains.
 Generates problems based on skill type and difficulty level.
 All logic is transparent and rules-based (no black-box AI).
 """
+import functools
+import itertools
 import random
 import math
-from typing import Dict, Any, Tuple
-from fractions import Fraction
+from types import MappingProxyType
+from typing import Dict, Any, List, Tuple
+
+
+# Shared read-only config for callers that don't pass one
+_EMPTY_CONFIG = MappingProxyType({})
 
 
 def generate_problem(problem_type: str, difficulty: int, config: dict = None) -> Dict[str, Any]:
     """Main dispatcher: generate a problem based on type and difficulty."""
-    generators = {
-        "fraction_comparison": _fraction_comparison,
-        "fraction_comparison_benchmark": _fraction_comparison_benchmark,
-        "equivalent_fractions": _equivalent_fractions,
-        "fraction_number_line": _fraction_number_line,
-        "integer_addition": _integer_addition,
-        "integer_subtraction": _integer_subtraction,
-        "integer_number_line": _integer_number_line,
-        "multiplication_facts": _multiplication_facts,
-    }
-    gen = generators.get(problem_type)
-    if not gen:
+    gen = _GENERATORS.get(problem_type)
+    if gen is None:
         raise ValueError(f"Unknown problem type: {problem_type}")
-    return gen(difficulty, config or {})
+    return gen(difficulty, _EMPTY_CONFIG if config is None else config)
+
+
+def generate_problems(problem_type: str, difficulty: int, count: int, config: dict = None) -> List[Dict[str, Any]]:
+    """Generate `count` problems in a row, as consecutive requests in one
+    practice session would.
+
+    For multiplication facts each problem's factors join the seen_facts
+    passed to the next, so the batch covers unseen facts before repeating.
+    """
+    config = dict(config or {})
+    track_facts = problem_type == "multiplication_facts"
+    if track_facts:
+        seen = set(config.get("seen_facts") or ())
+        config["seen_facts"] = seen
+
+    problems = []
+    for _ in range(count):
+        problem = generate_problem(problem_type, difficulty, config)
+        if track_facts:
+            a, b = problem["factors"]
+            seen.add((a, b) if a <= b else (b, a))
+        problems.append(problem)
+    return problems
+
+
+def _tier(difficulty: int) -> int:
+    """Clamp a difficulty to a 0-based index into the per-difficulty tables."""
+    return min(max(difficulty, 1), 5) - 1
 
 
 # ---------------------------------------------------------------------------
 # FRACTIONS
 # ---------------------------------------------------------------------------
 
+# Denominators available at difficulty 1-5
+_DENOMS_BY_DIFF = (
+    (2, 3, 4),
+    (2, 3, 4, 5, 6),
+    (2, 3, 4, 5, 6, 8, 10),
+    (3, 4, 5, 6, 7, 8, 9, 10, 12),
+    (3, 5, 6, 7, 8, 9, 10, 11, 12),
+)
+
+
+# Every proper fraction (n, d) at difficulty 1-5
+_FRAC_POOL = tuple(
+    tuple((n, d) for d in denoms for n in range(1, d)) for denoms in _DENOMS_BY_DIFF
+)
+# Cumulative weights over _FRAC_POOL giving each denominator equal total
+# weight (1/(d-1) per numerator), so one draw matches "pick a denominator,
+# then a numerator".
+_FRAC_CUM_WEIGHTS = tuple(
+    tuple(itertools.accumulate(1 / (d - 1) for _, d in pool)) for pool in _FRAC_POOL
+)
+
+
 def _pick_fraction(difficulty: int, exclude=None) -> Tuple[int, int]:
     """Generate a fraction (numerator, denominator) based on difficulty."""
-    if difficulty <= 1:
-        denoms = [2, 3, 4]
-    elif difficulty <= 2:
-        denoms = [2, 3, 4, 5, 6]
-    elif difficulty <= 3:
-        denoms = [2, 3, 4, 5, 6, 8, 10]
-    elif difficulty <= 4:
-        denoms = [3, 4, 5, 6, 7, 8, 9, 10, 12]
-    else:
-        denoms = [3, 5, 6, 7, 8, 9, 10, 11, 12]
+    tier = _tier(difficulty)
+    n, d = random.choices(_FRAC_POOL[tier], cum_weights=_FRAC_CUM_WEIGHTS[tier])[0]
+    if exclude and (n, d) == exclude:
+        # Step to a neighbouring fraction instead of resampling
+        if d > 2:
+            n = n % (d - 1) + 1
+        else:
+            denoms = _DENOMS_BY_DIFF[tier]
+            d = denoms[(denoms.index(d) + 1) % len(denoms)]
+            n = 1
+    return (n, d)
 
-    for _ in range(50):
-        d = random.choice(denoms)
-        n = random.randint(1, d - 1)
-        if exclude and (n, d) == exclude:
-            continue
-        return (n, d)
-    return (1, 2)
+
+# Shared by every comparison problem; a tuple so it can't be mutated and
+# still serialises to a JSON array.
+_CMP_CHOICES = ("<", "=", ">")
 
 
 def _fraction_comparison(difficulty: int, config: dict) -> dict:
     n1, d1 = _pick_fraction(difficulty)
     n2, d2 = _pick_fraction(difficulty, exclude=(n1, d1))
-    f1 = Fraction(n1, d1)
-    f2 = Fraction(n2, d2)
-    if f1 == f2:
+    # Denominators are positive, so cross-multiplying compares the fractions
+    # without building Fraction objects.
+    if n1 * d2 == n2 * d1:
         # Tweak to avoid equality at low difficulty
         n2 = min(n2 + 1, d2 - 1) if n2 < d2 - 1 else max(n2 - 1, 1)
-        f2 = Fraction(n2, d2)
 
-    if f1 > f2:
+    lhs, rhs = n1 * d2, n2 * d1
+    if lhs > rhs:
         correct = ">"
-    elif f1 < f2:
+    elif lhs < rhs:
         correct = "<"
     else:
         correct = "="
+    left_value, right_value = n1 / d1, n2 / d2
+    left_str, right_str = f"{n1}/{d1}", f"{n2}/{d2}"
 
     return {
         "type": "fraction_comparison",
-        "prompt": f"Compare: {n1}/{d1} ___ {n2}/{d2}",
+        "prompt": f"Compare: {left_str} ___ {right_str}",
         "left": {"numerator": n1, "denominator": d1},
         "right": {"numerator": n2, "denominator": d2},
-        "choices": ["<", "=", ">"],
+        "choices": _CMP_CHOICES,
         "correct_answer": correct,
         "visual_hint": {
             "type": "fraction_bars",
-            "left_value": float(f1),
-            "right_value": float(f2),
+            "left_value": left_value,
+            "right_value": right_value,
             "left_numerator": n1,
             "left_denominator": d1,
             "right_numerator": n2,
             "right_denominator": d2,
         },
-        "feedback_explanation": f"{n1}/{d1} = {float(f1):.3f} and {n2}/{d2} = {float(f2):.3f}",
+        "feedback_explanation": f"{left_str} = {left_value:.3f} and {right_str} = {right_value:.3f}",
     }
 
 
+_BENCHMARKS = ((0, 1), (1, 2), (1, 1))
+_BENCH_STR = {(0, 1): "0", (1, 2): "1/2", (1, 1): "1"}
+
+
 def _fraction_comparison_benchmark(difficulty: int, config: dict) -> dict:
     """Compare a fraction to a benchmark (0, 1/2, or 1)."""
-    benchmarks = [(0, 1), (1, 2), (1, 1)]
     if difficulty <= 2:
         benchmark = (1, 2)  # always compare to 1/2 at low difficulty
     else:
-        benchmark = random.choice(benchmarks)
+        benchmark = random.choice(_BENCHMARKS)
 
     n, d = _pick_fraction(difficulty)
-    frac = Fraction(n, d)
-    bench = Fraction(benchmark[0], benchmark[1])
+    bench_n, bench_d = benchmark
 
-    if frac > bench:
+    # Benchmarks have denominator 1 or 2, so this is n vs 0, n vs d, or 2n vs d
+    lhs, rhs = n * bench_d, bench_n * d
+    if lhs > rhs:
         correct = ">"
-    elif frac < bench:
+    elif lhs < rhs:
         correct = "<"
     else:
         correct = "="
+    frac_value, bench_value = n / d, bench_n / bench_d
 
-    bench_str = f"{benchmark[0]}/{benchmark[1]}" if benchmark != (0, 1) else "0"
-    if benchmark == (1, 1):
-        bench_str = "1"
-    if benchmark == (1, 2):
-        bench_str = "1/2"
+    bench_str = _BENCH_STR[benchmark]
+    frac_str = f"{n}/{d}"
 
     # Express benchmark using fraction's denominator for visual comparison
-    bench_numer_common = round(float(bench) * d)
+    bench_numer_common = round(bench_value * d)
 
     return {
         "type": "fraction_comparison_benchmark",
-        "prompt": f"Is {n}/{d} less than, equal to, or greater than {bench_str}?",
+        "prompt": f"Is {frac_str} less than, equal to, or greater than {bench_str}?",
         "fraction": {"numerator": n, "denominator": d},
         "benchmark": {"numerator": benchmark[0], "denominator": benchmark[1], "display": bench_str},
         "left": {"numerator": n, "denominator": d},
         "right": {"numerator": benchmark[0], "denominator": benchmark[1]},
-        "choices": ["<", "=", ">"],
+        "choices": _CMP_CHOICES,
         "correct_answer": correct,
         "visual_hint": {
             "type": "fraction_bars",
-            "left_value": float(frac),
-            "right_value": float(bench),
+            "left_value": frac_value,
+            "right_value": bench_value,
             "left_numerator": n,
             "left_denominator": d,
             "right_numerator": bench_numer_common,
             "right_denominator": d,
             "right_label": bench_str,
         },
-        "feedback_explanation": f"{n}/{d} = {float(frac):.3f}, benchmark {bench_str} = {float(bench):.3f}",
+        "feedback_explanation": f"{frac_str} = {frac_value:.3f}, benchmark {bench_str} = {bench_value:.3f}",
     }
 
 
+# Scale factors offered at difficulty 1-5
+_EQUIV_MULTIPLIERS_BY_DIFF = ((2, 3), (2, 3), (2, 3, 4), (2, 3, 4, 5, 6), (2, 3, 4, 5, 6))
+
+
 def _equivalent_fractions(difficulty: int, config: dict) -> dict:
     n, d = _pick_fraction(min(difficulty, 3))
-    if difficulty <= 2:
-        multipliers = [2, 3]
-    elif difficulty <= 3:
-        multipliers = [2, 3, 4]
-    else:
-        multipliers = [2, 3, 4, 5, 6]
-
-    m = random.choice(multipliers)
+    m = random.choice(_EQUIV_MULTIPLIERS_BY_DIFF[_tier(difficulty)])
     target_n, target_d = n * m, d * m
 
+    # Both variants share everything except which side of the target is missing
+    hint = {
+        "type": "fraction_bars",
+        "left_value": n / d,
+        "left_numerator": n,
+        "left_denominator": d,
+        "left_parts": d,
+        "right_parts": target_d,
+        "right_denominator": target_d,
+        "equiv_mode": True,
+    }
+    problem = {
+        "type": "equivalent_fractions",
+        "original": {"numerator": n, "denominator": d},
+        "visual_hint": hint,
+        "feedback_explanation": f"{n}/{d} × {m}/{m} = {target_n}/{target_d}",
+    }
+
     # Decide what to ask: find numerator or denominator
-    frac_val = float(Fraction(n, d))
     if random.random() < 0.5:
-        return {
-            "type": "equivalent_fractions",
-            "prompt": f"Find the missing number: {n}/{d} = ?/{target_d}",
-            "original": {"numerator": n, "denominator": d},
-            "target_denominator": target_d,
-            "missing": "numerator",
-            "correct_answer": str(target_n),
-            "visual_hint": {
-                "type": "fraction_bars",
-                "left_value": frac_val,
-                "left_numerator": n,
-                "left_denominator": d,
-                "left_parts": d,
-                "right_parts": target_d,
-                "right_denominator": target_d,
-                # right_numerator intentionally omitted — that's the answer
-                "equiv_mode": True,
-            },
-            "feedback_explanation": f"{n}/{d} × {m}/{m} = {target_n}/{target_d}",
-        }
+        problem["prompt"] = f"Find the missing number: {n}/{d} = ?/{target_d}"
+        problem["target_denominator"] = target_d
+        problem["missing"] = "numerator"
+        problem["correct_answer"] = str(target_n)
+        # right_numerator intentionally omitted — that's the answer
     else:
-        return {
-            "type": "equivalent_fractions",
-            "prompt": f"Find the missing number: {n}/{d} = {target_n}/?",
-            "original": {"numerator": n, "denominator": d},
-            "target_numerator": target_n,
-            "missing": "denominator",
-            "correct_answer": str(target_d),
-            "visual_hint": {
-                "type": "fraction_bars",
-                "left_value": frac_val,
-                "left_numerator": n,
-                "left_denominator": d,
-                "left_parts": d,
-                "right_parts": target_d,
-                "right_denominator": target_d,
-                "right_numerator": target_n,
-                "equiv_mode": True,
-            },
-            "feedback_explanation": f"{n}/{d} × {m}/{m} = {target_n}/{target_d}",
-        }
+        problem["prompt"] = f"Find the missing number: {n}/{d} = {target_n}/?"
+        problem["target_numerator"] = target_n
+        problem["missing"] = "denominator"
+        problem["correct_answer"] = str(target_d)
+        hint["right_numerator"] = target_n
+    return problem
+
+
+@functools.lru_cache(maxsize=None)
+def _frac_distractors(tier: int, n: int, d: int) -> Tuple[str, ...]:
+    """Number-line distractors for n/d: each fraction at that tier that is
+    visibly far from n/d, i.e. |cn/cd - n/d| > 0.05 (cross-multiplied by
+    d*cd), pre-formatted for display. Built on first use, then cached."""
+    return tuple(
+        f"{cn}/{cd}" for cn, cd in _FRAC_POOL[tier] if abs(cn * d - n * cd) > 0.05 * d * cd
+    )
 
 
 def _fraction_number_line(difficulty: int, config: dict) -> dict:
@@ -213,16 +256,11 @@ def _fraction_number_line(difficulty: int, config: dict) -> dict:
     """
     vis_level = config.get("visual_support_level", 5)
     n, d = _pick_fraction(difficulty)
-    frac_value = float(Fraction(n, d))
+    frac_value = n / d
+    frac_str = f"{n}/{d}"
 
     # Generate multiple-choice options (included or stripped by practice.py)
-    choices = [f"{n}/{d}"]
-    while len(choices) < 4:
-        cn, cd = _pick_fraction(difficulty)
-        c_str = f"{cn}/{cd}"
-        cv = float(Fraction(cn, cd))
-        if c_str not in choices and abs(cv - frac_value) > 0.05:
-            choices.append(c_str)
+    choices = [frac_str] + random.sample(_frac_distractors(_tier(difficulty), n, d), 3)
     random.shuffle(choices)
 
     # Labels shown at higher support levels, hidden at lower ones
@@ -234,14 +272,14 @@ def _fraction_number_line(difficulty: int, config: dict) -> dict:
         "position": frac_value,
         "number_line": {"min": 0, "max": 1, "tick_count": d + 1},
         "choices": choices,
-        "correct_answer": f"{n}/{d}",
+        "correct_answer": frac_str,
         "visual_hint": {
             "type": "number_line",
             "marked_position": frac_value,
             "denominator": d,
             "show_labels": show_labels,
         },
-        "feedback_explanation": f"The point is at {n}/{d} = {frac_value:.3f}",
+        "feedback_explanation": f"The point is at {frac_str} = {frac_value:.3f}",
     }
 
 
@@ -249,16 +287,37 @@ def _fraction_number_line(difficulty: int, config: dict) -> dict:
 # COMBINING INTEGERS
 # ---------------------------------------------------------------------------
 
+# Operand range at difficulty 1-5
+_INT_RANGE_BY_DIFF = ((-10, 10), (-20, 20), (-50, 50), (-100, 100), (-200, 200))
+_INT_VALUES_BY_DIFF = tuple(range(lo, hi + 1) for lo, hi in _INT_RANGE_BY_DIFF)
+
+
 def _int_range(difficulty: int) -> Tuple[int, int]:
-    if difficulty <= 1:
-        return (-10, 10)
-    elif difficulty <= 2:
-        return (-20, 20)
-    elif difficulty <= 3:
-        return (-50, 50)
-    elif difficulty <= 4:
-        return (-100, 100)
-    return (-200, 200)
+    return _INT_RANGE_BY_DIFF[_tier(difficulty)]
+
+
+def _sign_patterns(tier: int, lo: int, hi: int) -> tuple:
+    """Four equally likely (a_range, b_range) operand ranges for a tier.
+
+    Ranges rather than bounds, since random.choice on a range is cheaper
+    than random.randint.
+    """
+    full, neg, pos = range(lo, hi + 1), range(lo, 0), range(1, hi + 1)
+    if tier == 0:
+        # Difficulty 1: any combination
+        pairs = [(full, full)] * 4
+    elif tier == 1:
+        # Difficulty 2: guarantee at least one negative
+        pairs = [(neg, full), (full, neg)] * 2
+    else:
+        # Difficulty 3+: force mixed signs most of the time
+        pairs = [(pos, neg), (neg, pos), (neg, neg), (full, full)]
+    return tuple(pairs)
+
+
+_INT_OPERAND_PATTERNS = tuple(
+    _sign_patterns(tier, lo, hi) for tier, (lo, hi) in enumerate(_INT_RANGE_BY_DIFF)
+)
 
 
 def _pick_int_operands(difficulty: int) -> Tuple[int, int]:
@@ -267,36 +326,8 @@ def _pick_int_operands(difficulty: int) -> Tuple[int, int]:
     Difficulty 2: at least one operand is negative
     Difficulty 3+: guarantee mixed signs and larger magnitudes
     """
-    lo, hi = _int_range(difficulty)
-
-    if difficulty <= 1:
-        a = random.randint(lo, hi)
-        b = random.randint(lo, hi)
-    elif difficulty == 2:
-        # Guarantee at least one negative
-        if random.random() < 0.5:
-            a = random.randint(lo, -1)
-            b = random.randint(lo, hi)
-        else:
-            a = random.randint(lo, hi)
-            b = random.randint(lo, -1)
-    else:
-        # Difficulty 3+: force mixed signs most of the time
-        pattern = random.choice(["pos_neg", "neg_pos", "neg_neg", "mixed"])
-        if pattern == "pos_neg":
-            a = random.randint(1, hi)
-            b = random.randint(lo, -1)
-        elif pattern == "neg_pos":
-            a = random.randint(lo, -1)
-            b = random.randint(1, hi)
-        elif pattern == "neg_neg":
-            a = random.randint(lo, -1)
-            b = random.randint(lo, -1)
-        else:
-            a = random.randint(lo, hi)
-            b = random.randint(lo, hi)
-
-    return a, b
+    a_range, b_range = _INT_OPERAND_PATTERNS[_tier(difficulty)][random.getrandbits(2)]
+    return random.choice(a_range), random.choice(b_range)
 
 
 def _counter_data(a: int, b: int, operation: str) -> dict:
@@ -316,40 +347,37 @@ def _counter_data(a: int, b: int, operation: str) -> dict:
         To subtract positives: remove yellow counters (add zero pairs if needed).
         To subtract negatives: remove red counters (add zero pairs if needed).
     """
+    # Conditionals rather than max()/min()/abs() builtin calls
+    start_yellow = a if a > 0 else 0
+    start_red = -a if a < 0 else 0
     if operation == "+":
-        start_yellow = max(a, 0)
-        start_red = abs(min(a, 0))
-        add_yellow = max(b, 0)
-        add_red = abs(min(b, 0))
+        add_yellow = b if b > 0 else 0
+        add_red = -b if b < 0 else 0
     else:  # subtraction a - b
-        start_yellow = max(a, 0)
-        start_red = abs(min(a, 0))
         # Subtracting b: we need to remove b-type counters.
         # If b > 0, remove yellow. If not enough, add zero pairs first.
         # If b < 0, remove red. If not enough, add zero pairs first.
         if b > 0:
             # Need to remove b yellow counters
-            zero_pairs_needed = max(0, b - start_yellow)
-            add_yellow = zero_pairs_needed  # zero pairs added
-            add_red = zero_pairs_needed
+            zero_pairs_needed = b - start_yellow
             # "remove" is conceptual — the result handles it
         else:
             # b < 0: need to remove |b| red counters
-            abs_b = abs(b)
-            zero_pairs_needed = max(0, abs_b - start_red)
-            add_yellow = zero_pairs_needed
-            add_red = zero_pairs_needed
+            zero_pairs_needed = -b - start_red
+        if zero_pairs_needed < 0:
+            zero_pairs_needed = 0
+        add_yellow = add_red = zero_pairs_needed  # zero pairs added
 
     result = a + b if operation == "+" else a - b
-    result_yellow = max(result, 0)
-    result_red = abs(min(result, 0))
+    result_yellow = result if result > 0 else 0
+    result_red = -result if result < 0 else 0
 
     return {
         "start_yellow": start_yellow,
         "start_red": start_red,
         "add_yellow": add_yellow,
         "add_red": add_red,
-        "zero_pairs_needed": max(0, (add_yellow if operation == "-" else 0)),
+        "zero_pairs_needed": add_yellow if operation == "-" else 0,
         "result_yellow": result_yellow,
         "result_red": result_red,
         "result": result,
@@ -359,9 +387,42 @@ def _counter_data(a: int, b: int, operation: str) -> dict:
     }
 
 
+# The frontend only draws counters when |a| + |b| is at most this many
+_COUNTER_MODEL_MAX = 20
+
+
+def _counter_hint(a: int, b: int, operation: str, config: dict):
+    """Counter model data, or None when it won't be shown.
+
+    Skipped when the caller opts out with config["counter_model"] = False
+    or when there are too many counters for the model to be drawn.
+    """
+    if not config.get("counter_model", True):
+        return None
+    if (a if a > 0 else -a) + (b if b > 0 else -b) > _COUNTER_MODEL_MAX:
+        return None
+    return _counter_data(a, b, operation)
+
+
+def _line_bounds(a: int, result: int) -> Tuple[int, int]:
+    """Number-line window covering 0, the start and the result, plus margin.
+
+    Written with comparisons rather than 3-argument min()/max(), which are
+    several times slower for this many values.
+    """
+    lo = a if a < result else result
+    hi = a if a > result else result
+    if lo > 0:
+        lo = 0
+    if hi < 0:
+        hi = 0
+    return lo - 3, hi + 3
+
+
 def _integer_addition(difficulty: int, config: dict) -> dict:
     a, b = _pick_int_operands(difficulty)
     correct = a + b
+    line_min, line_max = _line_bounds(a, correct)
 
     prompt = f"{a} + ({b})" if b < 0 else f"{a} + {b}"
 
@@ -376,9 +437,9 @@ def _integer_addition(difficulty: int, config: dict) -> dict:
             "start": a,
             "move": b,
             "result": correct,
-            "line_min": min(a, correct, 0) - 3,
-            "line_max": max(a, correct, 0) + 3,
-            "counter_data": _counter_data(a, b, "+"),
+            "line_min": line_min,
+            "line_max": line_max,
+            "counter_data": _counter_hint(a, b, "+", config),
         },
         "feedback_explanation": f"Start at {a}, move {b} {'right' if b > 0 else 'left'} to reach {correct}",
     }
@@ -387,6 +448,7 @@ def _integer_addition(difficulty: int, config: dict) -> dict:
 def _integer_subtraction(difficulty: int, config: dict) -> dict:
     a, b = _pick_int_operands(difficulty)
     correct = a - b
+    line_min, line_max = _line_bounds(a, correct)
 
     prompt = f"{a} - ({b})" if b < 0 else f"{a} - {b}"
 
@@ -401,9 +463,9 @@ def _integer_subtraction(difficulty: int, config: dict) -> dict:
             "start": a,
             "move": -b,
             "result": correct,
-            "line_min": min(a, correct, 0) - 3,
-            "line_max": max(a, correct, 0) + 3,
-            "counter_data": _counter_data(a, b, "-"),
+            "line_min": line_min,
+            "line_max": line_max,
+            "counter_data": _counter_hint(a, b, "-", config),
         },
         "feedback_explanation": f"Start at {a}, subtract {b} to reach {correct}",
     }
@@ -412,13 +474,11 @@ def _integer_subtraction(difficulty: int, config: dict) -> dict:
 
 def _integer_number_line(difficulty: int, config: dict) -> dict:
     lo, hi = _int_range(difficulty)
-    target = random.randint(lo, hi)
+    target = random.choice(_INT_VALUES_BY_DIFF[_tier(difficulty)])
 
-    choices = [target]
-    while len(choices) < 4:
-        c = random.randint(lo, hi)
-        if c not in choices:
-            choices.append(c)
+    # Three distinct distractors: sample from a range one shorter than
+    # [lo, hi] and shift values at or above the target up by one.
+    choices = [target] + [c + (c >= target) for c in random.sample(range(lo, hi), 3)]
     random.shuffle(choices)
 
     return {
@@ -442,21 +502,17 @@ def _integer_number_line(difficulty: int, config: dict) -> dict:
 # MULTIPLICATION FLUENCY
 # ---------------------------------------------------------------------------
 
+# Factor range at difficulty 1-5
+_MULT_RANGE_BY_DIFF = ((0, 5), (0, 5), (2, 8), (2, 10), (2, 12))
+
+
 def _mult_range(difficulty: int) -> Tuple[int, int]:
     """Range used by related-facts and scaling generators.
 
     Slightly wider than the strict facts progression because these
     problem types need at least two distinct non-trivial factors.
     """
-    if difficulty <= 1:
-        return (0, 5)
-    elif difficulty <= 2:
-        return (0, 5)
-    elif difficulty <= 3:
-        return (2, 8)
-    elif difficulty <= 4:
-        return (2, 10)
-    return (2, 12)
+    return _MULT_RANGE_BY_DIFF[_tier(difficulty)]
 
 
 # Multiplication facts use a structured progression where each difficulty
@@ -472,27 +528,34 @@ _MULT_FACTS_LEVELS = {
 }
 
 
+# Products (and their string forms) for every fact 0×0 through 12×12
+_MULT_TABLE = tuple(tuple(i * j for j in range(13)) for i in range(13))
+_STR_MULT_TABLE = tuple(tuple(str(p) for p in row) for row in _MULT_TABLE)
+
+
 def _all_facts_for_level(difficulty: int):
-    """Return (focus_facts, review_facts) as sets of normalised (min,max) tuples."""
+    """Return (focus_facts, review_facts) as frozensets of normalised (min,max) tuples."""
     level = max(1, min(5, difficulty))
     focus, review = _MULT_FACTS_LEVELS[level]
     full_pool = focus + review
 
     # Focus facts: at least one factor from the focus set, paired with anything in the pool
-    focus_facts = set()
-    for f in focus:
-        for p in full_pool:
-            focus_facts.add((min(f, p), max(f, p)))
+    focus_facts = frozenset((min(f, p), max(f, p)) for f in focus for p in full_pool)
 
     # Review facts: both factors from the review set
-    review_facts = set()
-    for r1 in review:
-        for r2 in review:
-            review_facts.add((min(r1, r2), max(r1, r2)))
+    review_facts = frozenset((min(r1, r2), max(r1, r2)) for r1 in review for r2 in review)
 
     return focus_facts, review_facts
 
 
+# (focus_facts, review_facts, focus_list, review_list) at difficulty 1-5; the
+# tuple copies let the common no-repeats-left case pick without rebuilding.
+_FACTS_BY_DIFF = tuple(
+    (focus, review, tuple(focus), tuple(review))
+    for focus, review in (_all_facts_for_level(d) for d in range(1, 6))
+)
+
+
 def _pick_mult_factors(difficulty: int, seen_facts: set = None) -> Tuple[int, int]:
     """Coverage-aware picker for multiplication facts.
 
@@ -504,19 +567,17 @@ def _pick_mult_factors(difficulty: int, seen_facts: set = None) -> Tuple[int, in
     Within each category, unseen facts are chosen first; once all have
     been shown at least once, repeats are allowed.
     """
-    focus_facts, review_facts = _all_facts_for_level(difficulty)
-    seen = seen_facts or set()
-
-    unseen_focus = focus_facts - seen
-    unseen_review = review_facts - seen
+    focus_facts, review_facts, focus_list, review_list = _FACTS_BY_DIFF[_tier(difficulty)]
 
     # Decide category: review (30 %) or focus (70 %)
     do_review = bool(review_facts) and random.random() < 0.30
+    facts, pool = (review_facts, review_list) if do_review else (focus_facts, focus_list)
 
-    if do_review:
-        pool = list(unseen_review) if unseen_review else list(review_facts)
-    else:
-        pool = list(unseen_focus) if unseen_focus else list(focus_facts)
+    # Only narrow the pool when something has been seen and unseen facts remain
+    if seen_facts:
+        unseen = facts - seen_facts
+        if unseen:
+            pool = tuple(unseen)
 
     a, b = random.choice(pool)
 
@@ -526,6 +587,13 @@ def _pick_mult_factors(difficulty: int, seen_facts: set = None) -> Tuple[int, in
     return a, b
 
 
+# _distributive_split results for n = 0-12 (every factor the facts use)
+_SPLIT_TABLE = (
+    None, None, None, (2, 1), (2, 2), (3, 2), (5, 1),
+    (5, 2), (5, 3), (5, 4), (5, 5), (10, 1), (10, 2),
+)
+
+
 def _distributive_split(n: int):
     """Split n into two 'friendly' addends for the distributive property.
 
@@ -538,26 +606,17 @@ def _distributive_split(n: int):
       - n == 3 → (2, 1)             "doubles + 1 more"
       - n <= 2 → None               too small to benefit
     """
-    if n >= 11:
-        return (10, n - 10)
-    if 6 <= n <= 10:
-        return (5, n - 5)
-    if n == 5:
-        return (3, 2)
-    if n == 4:
-        return (2, 2)
-    if n == 3:
-        return (2, 1)
-    return None
+    if n < len(_SPLIT_TABLE):
+        return _SPLIT_TABLE[n] if n >= 0 else None
+    return (10, n - 10)
 
 
 def _multiplication_facts(difficulty: int, config: dict) -> dict:
-    seen_raw = config.get("seen_facts")
-    seen = set()
-    if seen_raw:
-        seen = {(min(a, b), max(a, b)) for a, b in seen_raw}
-    a, b = _pick_mult_factors(difficulty, seen)
-    correct = a * b
+    # seen_facts arrives as a set of normalised (min, max) pairs; the
+    # practice router builds it that way, so it is used as-is.
+    a, b = _pick_mult_factors(difficulty, config.get("seen_facts"))
+    correct = _MULT_TABLE[a][b]
+    expr = f"{a} × {b}"
 
     # Build the array model with the smaller factor as rows so the
     # visual reads naturally (e.g. 3 rows × 7 columns for 3×7).
@@ -586,11 +645,22 @@ def _multiplication_facts(difficulty: int, config: dict) -> dict:
 
     return {
         "type": "multiplication_facts",
-        "prompt": f"What is {a} × {b}?",
+        "prompt": f"What is {expr}?",
         "factors": [a, b],
-        "correct_answer": str(correct),
+        "correct_answer": _STR_MULT_TABLE[a][b],
         "visual_hint": hint,
-        "feedback_explanation": f"{a} × {b} = {correct}",
+        "feedback_explanation": f"{expr} = {correct}",
     }
 
 
+# Dispatch table for generate_problem (defined last so every generator exists)
+_GENERATORS = {
+    "fraction_comparison": _fraction_comparison,
+    "fraction_comparison_benchmark": _fraction_comparison_benchmark,
+    "equivalent_fractions": _equivalent_fractions,
+    "fraction_number_line": _fraction_number_line,
+    "integer_addition": _integer_addition,
+    "integer_subtraction": _integer_subtraction,
+    "integer_number_line": _integer_number_line,
+    "multiplication_facts": _multiplication_facts,
+}
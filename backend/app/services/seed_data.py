@@ -2,6 +2,7 @@
 Seed the database with math skills for all three MVP domains.
 Also creates a demo teacher and demo class for testing.
 """
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from app.models.skill import Skill
 from app.models.user import User
@@ -113,8 +114,13 @@ def seed_skills(db: Session):
     """Insert skills if not already present, and update display_order for existing ones."""
     from app.models.assignment import Assignment
 
+    # One query for every existing skill instead of one per seed row
+    existing_skills = {
+        skill.slug: skill
+        for skill in db.query(Skill).filter(Skill.slug.in_([sd["slug"] for sd in SKILLS]))
+    }
     for skill_data in SKILLS:
-        existing = db.query(Skill).filter(Skill.slug == skill_data["slug"]).first()
+        existing = existing_skills.get(skill_data["slug"])
         if not existing:
             db.add(Skill(**skill_data))
         else:
@@ -122,26 +128,32 @@ def seed_skills(db: Session):
             if existing.display_order != skill_data["display_order"]:
                 existing.display_order = skill_data["display_order"]
 
-    # Clean up removed skills and their dependent data
+    # Clean up removed skills and their dependent data: one bulk DELETE per
+    # table, however much history the removed skills have accumulated
     from app.models.attempt import PracticeSession, StudentAttempt
-
-    for slug in REMOVED_SLUGS:
-        old = db.query(Skill).filter(Skill.slug == slug).first()
-        if old:
-            assignments = db.query(Assignment).filter(Assignment.skill_id == old.id).all()
-            for a in assignments:
-                sessions = db.query(PracticeSession).filter(PracticeSession.assignment_id == a.id).all()
-                for s in sessions:
-                    db.query(StudentAttempt).filter(StudentAttempt.session_id == s.id).delete()
-                    db.delete(s)
-                db.delete(a)
-            db.delete(old)
+    from app.models.google_classroom import GoogleClassroomLink
+
+    skill_ids = select(Skill.id).where(Skill.slug.in_(REMOVED_SLUGS))
+    assignment_ids = select(Assignment.id).where(Assignment.skill_id.in_(skill_ids))
+    session_ids = select(PracticeSession.id).where(PracticeSession.assignment_id.in_(assignment_ids))
+    for model, condition in (
+        (StudentAttempt, StudentAttempt.session_id.in_(session_ids)),
+        (PracticeSession, PracticeSession.id.in_(session_ids)),
+        (GoogleClassroomLink, GoogleClassroomLink.assignment_id.in_(assignment_ids)),
+        (Assignment, Assignment.id.in_(assignment_ids)),
+        (Skill, Skill.slug.in_(REMOVED_SLUGS)),
+    ):
+        db.execute(delete(model).where(condition).execution_options(synchronize_session=False))
 
     db.commit()
 
 
 def seed_demo_data(db: Session):
-    """Create demo teacher, students, and a class for testing."""
+    """Create demo teacher, students, and a class for testing.
+
+    Everything is written in a single transaction, with one lookup per
+    table rather than one per row.
+    """
     # Demo teacher
     teacher = db.query(User).filter(User.username == "demo.teacher").first()
     if not teacher:
@@ -154,8 +166,7 @@ def seed_demo_data(db: Session):
             role="teacher",
         )
         db.add(teacher)
-        db.commit()
-        db.refresh(teacher)
+        db.flush()
 
     # Demo class
     classroom = db.query(Classroom).filter(Classroom.class_code == "DEMO01").first()
@@ -166,8 +177,7 @@ def seed_demo_data(db: Session):
             teacher_id=teacher.id,
         )
         db.add(classroom)
-        db.commit()
-        db.refresh(classroom)
+        db.flush()
 
     # Demo students
     demo_students = [
@@ -175,26 +185,36 @@ def seed_demo_data(db: Session):
         ("Emma", "Brown"), ("Liam", "Davis"), ("Sophia", "Martinez"),
         ("Noah", "Anderson"), ("Olivia", "Taylor"),
     ]
-    for first, last in demo_students:
-        username = f"{first.lower()}.{last.lower()}"
-        student = db.query(User).filter(User.username == username).first()
-        if not student:
+    usernames = [f"{first.lower()}.{last.lower()}" for first, last in demo_students]
+    students = {
+        user.username: user
+        for user in db.query(User).filter(User.username.in_(usernames))
+    }
+    # Demo accounts share one password, so hash it once rather than per student
+    student_password = None
+    for (first, last), username in zip(demo_students, usernames):
+        if username not in students:
+            if student_password is None:
+                student_password = hash_password("student")
             student = User(
                 first_name=first,
                 last_name=last,
                 username=username,
-                hashed_password=hash_password("student"),
+                hashed_password=student_password,
                 role="student",
             )
             db.add(student)
-            db.commit()
-            db.refresh(student)
+            students[username] = student
+    db.flush()
 
-        # Enroll
-        existing = db.query(ClassEnrollment).filter(
+    # Enroll
+    enrolled = {
+        student_id
+        for (student_id,) in db.query(ClassEnrollment.student_id).filter(
             ClassEnrollment.classroom_id == classroom.id,
-            ClassEnrollment.student_id == student.id,
-        ).first()
-        if not existing:
+        )
+    }
+    for student in students.values():
+        if student.id not in enrolled:
             db.add(ClassEnrollment(classroom_id=classroom.id, student_id=student.id))
     db.commit()
@@ -0,0 +1,22 @@
+"""Throughput benchmarks for the problem generator.
+
+Not collected by a plain ``pytest tests/`` run; invoke explicitly:
+
+    python -m pytest tests/bench_problem_generator.py --benchmark-only
+"""
+import pytest
+from app.services.problem_generator import generate_problem, generate_problems
+from tests.test_problem_generator import PROBLEM_TYPES
+
+
+@pytest.mark.parametrize("difficulty", [1, 3, 5])
+@pytest.mark.parametrize("ptype", PROBLEM_TYPES)
+def test_generate_problem(benchmark, ptype, difficulty):
+    benchmark(generate_problem, ptype, difficulty)
+
+
+def test_multiplication_session(benchmark):
+    """A 15-problem session, with seen_facts growing as it would in practice."""
+    benchmark.pedantic(
+        generate_problems, args=("multiplication_facts", 5, 15), rounds=100, iterations=10,
+    )
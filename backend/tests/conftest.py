@@ -4,124 +4,205 @@ Shared test fixtures.
 Unit tests use no database.
 Integration tests use an in-memory SQLite database with the full FastAPI
 app wired to it, plus helper fixtures for creating users and tokens.
+Under pytest-xdist (``-n auto``) every worker is its own process and so
+gets its own database; nothing is shared between workers.
 """
 import os, pytest
+from types import MappingProxyType
 
 # Force SQLite BEFORE any app imports touch settings / engine
-os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+os.environ["DATABASE_URL"] = "sqlite://"
 os.environ["SECRET_KEY"] = "test-secret-key"
 os.environ["CORS_ORIGINS"] = "http://localhost"
 
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
 
-from app.core.database import Base, get_db
-from app.core.security import hash_password, create_access_token
-from app.main import app
+# The FastAPI app, models and security helpers are imported inside the
+# fixtures that need them, so unit-test-only runs never load the web stack.
 
 # ── SQLite test engine ────────────────────────────────────
-TEST_DB_URL = "sqlite:///./test.db"
-engine = create_engine(TEST_DB_URL, connect_args={"check_same_thread": False})
+# In-memory, with every connection sharing the one database via StaticPool.
+# Separate from the app's own engine, which only sees startup seeding.
+TEST_DB_URL = "sqlite://"
+engine = create_engine(
+    TEST_DB_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
 
 @event.listens_for(engine, "connect")
 def _sqlite_fk(dbapi_conn, _):
     cursor = dbapi_conn.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
+    # Stop pysqlite's implicit BEGIN; _sqlite_begin emits it instead so
+    # SAVEPOINTs nest inside the per-test transaction.
+    dbapi_conn.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _sqlite_begin(conn):
+    conn.exec_driver_sql("BEGIN")
 
 TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 # ── Fixtures ──────────────────────────────────────────────
 
-@pytest.fixture(scope="session", autouse=True)
-def _create_tables():
-    """Create all tables once for the test session."""
+@pytest.fixture(scope="session")
+def _fast_password_hashing():
+    """Hash passwords at bcrypt's minimum cost for the rest of the run.
+
+    Still real bcrypt through the app's own CryptContext, so login and
+    registration exercise the production code path, just ~250x cheaper
+    than the default 12 rounds.
+    """
+    from app.core.security import pwd_context
+    pwd_context.update(bcrypt__rounds=4)
+
+
+@pytest.fixture(scope="session")
+def _create_tables(_fast_password_hashing):
+    """Create all tables once, the first time a test needs the database.
+
+    No teardown: the in-memory database goes away with the engine.
+    """
+    from app.core.database import Base
+    import app.main  # noqa: F401 — registers every model on Base.metadata
     Base.metadata.create_all(bind=engine)
     yield
-    Base.metadata.drop_all(bind=engine)
-    # Clean up test db file
-    import pathlib
-    pathlib.Path("test.db").unlink(missing_ok=True)
 
 
-@pytest.fixture()
-def db():
-    """Provide a clean database session that rolls back after each test."""
+@pytest.fixture(scope="session")
+def _connection(_create_tables):
+    """One connection and outer transaction for the whole test session.
+
+    Rows shared by every test (the test users) live in this transaction,
+    which is rolled back at the end so nothing is ever committed.
+    """
     connection = engine.connect()
     transaction = connection.begin()
-    session = TestSession(bind=connection)
-    yield session
-    session.close()
+    yield connection
     transaction.rollback()
     connection.close()
 
 
+@pytest.fixture(scope="session")
+def _session_db(_connection):
+    """Session for the rows shared by every test."""
+    session = TestSession(bind=_connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="module")
+def module_db(_connection, teacher, student):
+    """Provide a session for rows shared by the tests of one module.
+
+    Its SAVEPOINT is rolled back when the module finishes. Depends on the
+    shared users so they are created before it opens and outlive it.
+    """
+    savepoint = _connection.begin_nested()
+    session = TestSession(bind=_connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    savepoint.rollback()
+
+
 @pytest.fixture()
-def client(db):
-    """FastAPI TestClient wired to the test database session."""
-    def _override():
-        try:
-            yield db
-        finally:
-            pass
-    app.dependency_overrides[get_db] = _override
+def db(_connection):
+    """Provide a clean database session that rolls back after each test.
+
+    Each test runs in its own SAVEPOINT on the shared connection, and the
+    session joins it through a nested SAVEPOINT, so code under test can
+    commit or roll back freely without ending either.
+    """
+    savepoint = _connection.begin_nested()
+    session = TestSession(bind=_connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    savepoint.rollback()
+
+
+@pytest.fixture(scope="session")
+def _client(_fast_password_hashing):
+    """One TestClient for the run, so app startup runs only once."""
+    from fastapi.testclient import TestClient
+    from app.main import app
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
 
 
 @pytest.fixture()
-def teacher(db):
-    """Create and return a teacher user."""
+def client(_client, db):
+    """FastAPI TestClient wired to the test database session."""
+    from app.core.database import get_db
+    from app.main import app
+    app.dependency_overrides[get_db] = lambda: db
+    yield _client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def password_hash(_fast_password_hashing):
+    """Hash of "password", shared by every test user."""
+    from app.core.security import hash_password
+    return hash_password("password")
+
+
+@pytest.fixture(scope="session")
+def teacher(_session_db, password_hash):
+    """Create and return a teacher user, shared by every test."""
     from app.models.user import User
     user = User(
         first_name="Test",
         last_name="Teacher",
         username="test.teacher",
         email="teacher@test.com",
-        hashed_password=hash_password("password"),
+        hashed_password=password_hash,
         role="teacher",
     )
-    db.add(user)
-    db.flush()
+    _session_db.add(user)
+    _session_db.flush()
     return user
 
 
-@pytest.fixture()
-def student(db):
-    """Create and return a student user."""
+@pytest.fixture(scope="session")
+def student(_session_db, password_hash):
+    """Create and return a student user, shared by every test."""
     from app.models.user import User
     user = User(
         first_name="Test",
         last_name="Student",
         username="test.student",
-        hashed_password=hash_password("password"),
+        hashed_password=password_hash,
         role="student",
     )
-    db.add(user)
-    db.flush()
+    _session_db.add(user)
+    _session_db.flush()
     return user
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def teacher_token(teacher):
+    from app.core.security import create_access_token
     return create_access_token({"sub": str(teacher.id), "role": "teacher"})
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def student_token(student):
+    from app.core.security import create_access_token
     return create_access_token({"sub": str(student.id), "role": "student"})
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def auth_teacher(teacher_token):
-    """Return Authorization header dict for teacher."""
-    return {"Authorization": f"Bearer {teacher_token}"}
+    """Return Authorization header dict for teacher (read-only, it's shared)."""
+    return MappingProxyType({"Authorization": f"Bearer {teacher_token}"})
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def auth_student(student_token):
-    """Return Authorization header dict for student."""
-    return {"Authorization": f"Bearer {student_token}"}
+    """Return Authorization header dict for student (read-only, it's shared)."""
+    return MappingProxyType({"Authorization": f"Bearer {student_token}"})
@@ -1,4 +1,5 @@
 """Unit tests for the adaptation engine — no database required."""
+import pytest
 from app.services.adaptation import (
     adapt_after_group, get_group_number, is_group_boundary,
     compute_fluency_status, get_session_config,
@@ -15,21 +16,16 @@ class TestSessionStructure:
         assert GROUP_SIZE == 3
         assert NUM_GROUPS == 5
 
-    def test_group_number_mapping(self):
-        assert get_group_number(1) == 1
-        assert get_group_number(3) == 1
-        assert get_group_number(4) == 2
-        assert get_group_number(6) == 2
-        assert get_group_number(13) == 5
-        assert get_group_number(15) == 5
+    @pytest.mark.parametrize("seq,expected", [(1, 1), (3, 1), (4, 2), (6, 2), (13, 5), (15, 5)])
+    def test_group_number_mapping(self, seq, expected):
+        assert get_group_number(seq) == expected
 
     def test_group_boundaries(self):
-        boundaries = [s for s in range(1, 16) if is_group_boundary(s)]
-        assert boundaries == [3, 6, 9, 12, 15]
-
-    def test_non_boundaries(self):
-        for s in [1, 2, 4, 5, 7, 8, 10, 11, 13, 14]:
-            assert not is_group_boundary(s)
+        """Exactly the last problem of each group is a boundary; checks every
+        sequence number, so it covers the non-boundaries too."""
+        expected = set(range(GROUP_SIZE, SESSION_TOTAL + 1, GROUP_SIZE))
+        boundaries = {s for s in range(1, SESSION_TOTAL + 1) if is_group_boundary(s)}
+        assert boundaries == expected == {3, 6, 9, 12, 15}
 
 
 # ── Adaptation rules ─────────────────────────────────────
@@ -168,19 +164,15 @@ class TestSessionConfig:
 
 
 class TestParameterizedGroupHelpers:
-    def test_group_number_with_custom_size(self):
+    @pytest.mark.parametrize("seq,expected", [(1, 1), (5, 1), (6, 2), (25, 5)])
+    def test_group_number_with_custom_size(self, seq, expected):
         """With group_size=5: problems 1-5 → group 1, 6-10 → group 2, etc."""
-        assert get_group_number(1, group_size=5, num_groups=5) == 1
-        assert get_group_number(5, group_size=5, num_groups=5) == 1
-        assert get_group_number(6, group_size=5, num_groups=5) == 2
-        assert get_group_number(25, group_size=5, num_groups=5) == 5
+        assert get_group_number(seq, group_size=5, num_groups=5) == expected
 
-    def test_group_boundary_with_custom_size(self):
+    @pytest.mark.parametrize("seq,expected", [(5, True), (10, True), (3, False), (7, False)])
+    def test_group_boundary_with_custom_size(self, seq, expected):
         """With group_size=5: boundaries at 5, 10, 15, 20, 25."""
-        assert is_group_boundary(5, group_size=5)
-        assert is_group_boundary(10, group_size=5)
-        assert not is_group_boundary(3, group_size=5)
-        assert not is_group_boundary(7, group_size=5)
+        assert is_group_boundary(seq, group_size=5) == expected
 
 
 class TestAdaptGroupOfFive:
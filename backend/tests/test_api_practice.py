@@ -1,41 +1,87 @@
 """Integration tests for the practice session flow."""
 import pytest
+from app.main import app
+from app.core.database import get_db
 from app.models.classroom import Classroom, ClassEnrollment
 from app.models.skill import Skill
 from app.models.assignment import Assignment
 from app.services.adaptation import SESSION_TOTAL, GROUP_SIZE, get_session_config
 
 
-@pytest.fixture()
-def classroom_with_assignment(db, teacher, student):
-    """Set up a classroom, enrollment, skill, and active assignment."""
+@pytest.fixture(scope="module")
+def classroom_with_assignment(module_db, teacher, student):
+    """Set up a classroom, enrollment, skill, and active assignment.
+
+    Created once per module; the sessions and attempts each test adds
+    roll back with that test's SAVEPOINT.
+    """
     classroom = Classroom(
         name="Test Class", class_code="TEST01", teacher_id=teacher.id,
     )
-    db.add(classroom)
-    db.flush()
-
-    db.add(ClassEnrollment(classroom_id=classroom.id, student_id=student.id))
-    db.flush()
-
     skill = Skill(
         domain="integers", name="Adding Integers", slug="test-int-add",
         description="Test", grade_level=5, difficulty_min=1, difficulty_max=5,
         problem_type="integer_addition", display_order=1,
     )
-    db.add(skill)
-    db.flush()
-
     assignment = Assignment(
-        classroom_id=classroom.id, skill_id=skill.id,
+        classroom=classroom, skill=skill,
         assigned_by=teacher.id, visual_supports=True,
     )
-    db.add(assignment)
-    db.flush()
+    # Relationships let one flush insert everything in dependency order
+    module_db.add_all([
+        classroom, skill, assignment,
+        ClassEnrollment(classroom=classroom, student_id=student.id),
+    ])
+    module_db.flush()
 
     return {"classroom": classroom, "skill": skill, "assignment": assignment}
 
 
+@pytest.fixture(scope="module")
+def completed_session(_client, module_db, teacher, student, auth_student):
+    """Play one full session through the API and record every response.
+
+    Shared by the tests that only inspect a finished session. It uses its
+    own class and skill so the completed session can't change the starting
+    levels other tests see.
+    """
+    classroom = Classroom(name="Completed Class", class_code="TEST02", teacher_id=teacher.id)
+    skill = Skill(
+        domain="integers", name="Subtracting Integers", slug="test-int-sub",
+        description="Test", grade_level=5, difficulty_min=1, difficulty_max=5,
+        problem_type="integer_subtraction", display_order=2,
+    )
+    assignment = Assignment(
+        classroom=classroom, skill=skill,
+        assigned_by=teacher.id, visual_supports=True,
+    )
+    module_db.add_all([
+        classroom, skill, assignment,
+        ClassEnrollment(classroom=classroom, student_id=student.id),
+    ])
+    module_db.flush()
+
+    app.dependency_overrides[get_db] = lambda: module_db
+    try:
+        session = _client.post(
+            "/api/practice/start", json={"assignment_id": assignment.id}, headers=auth_student,
+        ).json()
+        problems, feedback = [], []
+        for _ in range(SESSION_TOTAL):
+            problem = _client.get(f"/api/practice/problem/{session['id']}", headers=auth_student).json()
+            problems.append(problem)
+            # correct_answer is stripped, so just submit something
+            feedback.append(_client.post("/api/practice/answer", json={
+                "session_id": session["id"],
+                "problem_id": problem["problem_id"],
+                "student_answer": "0",
+                "response_time_ms": 3000,
+            }, headers=auth_student).json())
+    finally:
+        app.dependency_overrides.clear()
+    return {"session": session, "problems": problems, "feedback": feedback}
+
+
 class TestPracticeFlow:
     def test_start_session(self, client, auth_student, classroom_with_assignment):
         aid = classroom_with_assignment["assignment"].id
@@ -76,64 +122,34 @@ class TestPracticeFlow:
         assert fb["session_progress"]["total"] == SESSION_TOTAL
         assert fb["session_progress"]["answered"] == 1  # no off-by-one
 
-    def test_full_session_completes_at_15(self, client, auth_student, classroom_with_assignment):
+    def test_full_session_completes_at_15(self, client, auth_student, completed_session):
         """Run a full 15-problem session and verify it completes correctly."""
-        aid = classroom_with_assignment["assignment"].id
-        session = client.post("/api/practice/start", json={"assignment_id": aid}, headers=auth_student).json()
-        sid = session["id"]
-
-        for i in range(SESSION_TOTAL):
-            problem = client.get(f"/api/practice/problem/{sid}", headers=auth_student).json()
-            assert problem["sequence_number"] == i + 1
-            # Submit correct answer
-            correct = problem["problem_data"].get("correct_answer")
-            # correct_answer is stripped, so just submit something
-            client.post("/api/practice/answer", json={
-                "session_id": sid,
-                "problem_id": problem["problem_id"],
-                "student_answer": "0",
-                "response_time_ms": 3000,
-            }, headers=auth_student)
+        sequence = [p["sequence_number"] for p in completed_session["problems"]]
+        assert sequence == list(range(1, SESSION_TOTAL + 1))
 
         # Trying to get problem 16 should fail
+        sid = completed_session["session"]["id"]
         resp = client.get(f"/api/practice/problem/{sid}", headers=auth_student)
         assert resp.status_code == 400
         assert "complete" in resp.json()["detail"].lower()
 
-    def test_adaptation_fires_at_group_boundary(self, client, auth_student, classroom_with_assignment):
+    def test_adaptation_fires_at_group_boundary(self, completed_session):
         """After answering problem 3, the adaptation should run."""
-        aid = classroom_with_assignment["assignment"].id
-        session = client.post("/api/practice/start", json={"assignment_id": aid}, headers=auth_student).json()
-        sid = session["id"]
-        initial_vis = session["visual_support_level"]
-
-        # Answer 3 problems correctly (we need the actual correct answers)
-        for i in range(GROUP_SIZE):
-            problem = client.get(f"/api/practice/problem/{sid}", headers=auth_student).json()
-            # We can't see the correct answer from the API, so we'll query it differently.
-            # Submit the answer; we'll check that adaptation_reason appears on problem 3
-            resp = client.post("/api/practice/answer", json={
-                "session_id": sid,
-                "problem_id": problem["problem_id"],
-                "student_answer": "0",  # likely wrong
-                "response_time_ms": 3000,
-            }, headers=auth_student)
-
-        fb = resp.json()
+        fb = completed_session["feedback"][GROUP_SIZE - 1]
         # After problem 3 (group boundary), adaptation_reason should be non-empty
         # (regardless of whether student was right or wrong, adaptation runs)
         assert "adaptation_reason" in fb
         # The reason string should be non-empty since it's a boundary
         assert len(fb["adaptation_reason"]) > 0
 
-    def test_unenrolled_student_rejected(self, client, db, classroom_with_assignment):
+    def test_unenrolled_student_rejected(self, client, db, classroom_with_assignment, password_hash):
         """A student not in the class can't start a session."""
         from app.models.user import User
-        from app.core.security import hash_password, create_access_token
+        from app.core.security import create_access_token
 
         outsider = User(
             first_name="Outside", last_name="Kid", username="outsider",
-            hashed_password=hash_password("pass"), role="student",
+            hashed_password=password_hash, role="student",
         )
         db.add(outsider)
         db.flush()
@@ -0,0 +1,256 @@
+"""Integration tests for the Google Classroom service with a fake API client."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models.classroom import Classroom
+from app.models.skill import Skill
+from app.models.assignment import Assignment
+from app.models.google_classroom import CourseImportJob, GoogleClassroomLink
+from app.services import google_classroom_service
+
+
+class _Request:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self, num_retries=0):
+        if isinstance(self._result, Exception):
+            raise self._result
+        return self._result
+
+
+class _CourseWork:
+    def __init__(self, api):
+        self._api = api
+
+    def create(self, courseId, body):
+        self._api.created.append((courseId, body))
+        if self._api.fail_create:
+            return _Request(RuntimeError("Classroom API unavailable"))
+        return _Request({"id": f"cw-{len(self._api.created)}", "title": body["title"]})
+
+
+class _Students:
+    def __init__(self, api):
+        self._api = api
+
+    def list(self, courseId, pageSize, pageToken=None):
+        students = [
+            {"profile": {"id": f"g-{first}", "name": {"givenName": first, "familyName": last}}}
+            for first, last in self._api.rosters.get(courseId, [])
+        ]
+        return _Request({"students": students})
+
+
+class _Courses:
+    def __init__(self, api):
+        self._api = api
+
+    def courseWork(self):
+        return _CourseWork(self._api)
+
+    def students(self):
+        return _Students(self._api)
+
+    def get(self, id, **kwargs):
+        self._api.course_gets.append(id)
+        course = {"id": id, "name": "Period 1"}
+        if self._api.course_section:
+            course["section"] = self._api.course_section
+        return _Request(course)
+
+    def list(self, teacherId, courseStates, pageSize, pageToken=None):
+        page = int(pageToken or 0)
+        resp = {"courses": self._api.course_pages[page]}
+        if page + 1 < len(self._api.course_pages):
+            resp["nextPageToken"] = str(page + 1)
+        return _Request(resp)
+
+
+class FakeClassroomAPI:
+    """Just enough of the googleapiclient surface for the Classroom service."""
+
+    def __init__(self, fail_create=False):
+        self.fail_create = fail_create
+        self.created = []
+        self.course_gets = []
+        self.course_section = ""
+        self.course_pages = [[]]
+        self.rosters = {}
+
+    def courses(self):
+        return _Courses(self)
+
+
+@pytest.fixture()
+def assignment(db, teacher):
+    classroom = Classroom(name="Test Class", class_code="GCTEST", teacher_id=teacher.id)
+    db.add(classroom)
+    db.flush()
+    skill = Skill(
+        domain="integers", name="Adding Integers", slug="test-gc-int-add",
+        description="Test", grade_level=5, difficulty_min=1, difficulty_max=5,
+        problem_type="integer_addition", display_order=1,
+    )
+    db.add(skill)
+    db.flush()
+    assignment = Assignment(
+        classroom_id=classroom.id, skill_id=skill.id, assigned_by=teacher.id,
+    )
+    db.add(assignment)
+    db.flush()
+    return assignment
+
+
+@pytest.fixture()
+def fake_api(monkeypatch):
+    api = FakeClassroomAPI()
+    monkeypatch.setattr(google_classroom_service, "_build_service", lambda db, tid: api)
+    monkeypatch.setattr(google_classroom_service, "get_credentials", lambda db, tid: None)
+    monkeypatch.setattr(google_classroom_service, "_service_for", lambda creds: api)
+    return api
+
+
+class TestPostAssignment:
+    def test_post_stores_link(self, db, teacher, assignment, fake_api):
+        result = google_classroom_service.post_assignment(
+            db, teacher.id, assignment.id, "course-1",
+        )
+        assert result["coursework_id"] == "cw-1"
+        link = db.query(GoogleClassroomLink).filter(
+            GoogleClassroomLink.assignment_id == assignment.id
+        ).one()
+        assert link.classroom_coursework_id == "cw-1"
+        assert link.course_name == "Period 1"
+        assert fake_api.course_gets == ["course-1"]
+
+    def test_post_uses_imported_course_name(self, db, teacher, assignment, fake_api):
+        assignment.classroom.google_course_id = "course-1"
+        db.flush()
+        result = google_classroom_service.post_assignment(
+            db, teacher.id, assignment.id, "course-1",
+        )
+        assert result["course_name"] == "Test Class"
+        assert fake_api.course_gets == []
+
+    def test_post_to_imported_course_with_section(self, db, teacher, assignment, fake_api):
+        fake_api.course_pages = [[{"id": "course-1", "name": "Math", "section": "Period 2"}]]
+        google_classroom_service.import_courses(db, teacher.id)
+
+        result = google_classroom_service.post_assignment(
+            db, teacher.id, assignment.id, "course-1",
+        )
+        # The class's display name, section included, as shown in NumberSense
+        assert result["course_name"] == "Math — Period 2"
+        link = db.query(GoogleClassroomLink).filter(
+            GoogleClassroomLink.assignment_id == assignment.id
+        ).one()
+        assert link.course_name == "Math — Period 2"
+        assert fake_api.course_gets == []
+
+    def test_post_fallback_name_includes_section(self, db, teacher, assignment, fake_api):
+        fake_api.course_section = "Room 4"
+        result = google_classroom_service.post_assignment(
+            db, teacher.id, assignment.id, "course-1",
+        )
+        assert result["course_name"] == "Period 1 — Room 4"
+
+    def test_duplicate_post_rejected_before_api_call(self, db, teacher, assignment, fake_api):
+        google_classroom_service.post_assignment(db, teacher.id, assignment.id, "course-1")
+        with pytest.raises(ValueError, match="already been posted"):
+            google_classroom_service.post_assignment(db, teacher.id, assignment.id, "course-1")
+        assert len(fake_api.created) == 1
+
+    def test_failed_post_releases_reservation(self, db, teacher, assignment, fake_api):
+        fake_api.fail_create = True
+        with pytest.raises(ValueError, match="Failed to post"):
+            google_classroom_service.post_assignment(db, teacher.id, assignment.id, "course-1")
+        assert db.query(GoogleClassroomLink).count() == 0
+
+
+class TestImportCourses:
+    def test_imports_every_page_with_rosters(self, db, teacher, fake_api):
+        fake_api.course_pages = [
+            [{"id": "c1", "name": "Math", "section": "P1"}],
+            [{"id": "c2", "name": "Math", "section": "P2"}],
+        ]
+        fake_api.rosters = {
+            "c1": [("Ada", "Lovelace"), ("Alan", "Turing")],
+            "c2": [("Ada", "Lovelace")],
+        }
+        results = google_classroom_service.import_courses(db, teacher.id)
+        assert [r["google_course_id"] for r in results] == ["c1", "c2"]
+        assert [r["new_students"] for r in results] == [2, 1]
+        assert results[0]["name"] == "Math — P1"
+
+    def test_reimport_syncs_existing_classroom(self, db, teacher, fake_api):
+        fake_api.course_pages = [[{"id": "c1", "name": "Math"}]]
+        fake_api.rosters = {"c1": [("Ada", "Lovelace")]}
+        google_classroom_service.import_courses(db, teacher.id)
+
+        fake_api.rosters["c1"].append(("Alan", "Turing"))
+        results = google_classroom_service.import_courses(db, teacher.id)
+        assert results[0]["status"] == "already_imported"
+        assert results[0]["new_students"] == 1
+        assert results[0]["student_count"] == 2
+
+    def test_reports_progress_after_each_course(self, db, teacher, fake_api):
+        fake_api.course_pages = [[{"id": "c1", "name": "Math"}, {"id": "c2", "name": "Science"}]]
+        progress = []
+        google_classroom_service.import_courses(
+            db, teacher.id, on_progress=lambda results: progress.append(len(results)),
+        )
+        assert progress == [1, 2]
+
+    def test_duplicate_roster_entries_enroll_once(self, db, teacher, fake_api):
+        fake_api.course_pages = [[{"id": "c1", "name": "Math"}]]
+        fake_api.rosters = {"c1": [("Ada", "Lovelace"), ("ADA", "Lovelace"), ("", "Nobody")]}
+        results = google_classroom_service.import_courses(db, teacher.id)
+        assert results[0]["new_students"] == 1
+
+
+class TestImportJobs:
+    def test_job_records_import_results(self, db, teacher, fake_api):
+        fake_api.course_pages = [[{"id": "c1", "name": "Math"}]]
+        fake_api.rosters = {"c1": [("Ada", "Lovelace")]}
+        job_id = google_classroom_service.create_import_job(db, teacher.id).id
+        teacher_id = teacher.id
+        assert google_classroom_service.get_import_job(db, job_id, teacher_id)["status"] == "pending"
+
+        google_classroom_service.run_import_job(job_id, _session_factory=lambda: db)
+
+        result = google_classroom_service.get_import_job(db, job_id, teacher_id)
+        assert result["status"] == "completed"
+        assert [c["google_course_id"] for c in result["courses"]] == ["c1"]
+
+    def test_job_hidden_from_other_teachers(self, db, teacher, fake_api):
+        job = google_classroom_service.create_import_job(db, teacher.id)
+        assert google_classroom_service.get_import_job(db, job.id, "someone-else") is None
+
+    def test_stalled_job_reported_failed(self, db, teacher):
+        job = google_classroom_service.create_import_job(db, teacher.id)
+        job.status = "running"
+        job.updated_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        db.commit()
+
+        result = google_classroom_service.get_import_job(db, job.id, teacher.id)
+        assert result["status"] == "failed"
+        assert "interrupted" in result["error"]
+        # Reading the job doesn't write it...
+        db.expire_all()
+        assert db.get(CourseImportJob, job.id).status == "running"
+
+        # ...starting the next import does
+        google_classroom_service.create_import_job(db, teacher.id)
+        db.expire_all()
+        assert db.get(CourseImportJob, job.id).status == "failed"
+
+    def test_recent_running_job_left_alone(self, db, teacher):
+        job = google_classroom_service.create_import_job(db, teacher.id)
+        job.status = "running"
+        db.commit()
+        assert google_classroom_service.get_import_job(db, job.id, teacher.id)["status"] == "running"
+
+        google_classroom_service.create_import_job(db, teacher.id)
+        db.expire_all()
+        assert db.get(CourseImportJob, job.id).status == "running"
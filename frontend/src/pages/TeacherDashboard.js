@@ -3,6 +3,10 @@ import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/common/Navbar';
 import api from '../services/api';
 
+// Longer than the server's 10-minute stalled-job cutoff, so a dead import
+// normally surfaces as a failed job before the client gives up.
+const SYNC_MAX_WAIT_MS = 15 * 60 * 1000;
+
 export default function TeacherDashboard() {
   const [classrooms, setClassrooms] = useState([]);
   const [showCreate, setShowCreate] = useState(false);
@@ -10,6 +14,7 @@ export default function TeacherDashboard() {
   const [loading, setLoading] = useState(true);
   const [googleStatus, setGoogleStatus] = useState(null);
   const [googleLoading, setGoogleLoading] = useState(false);
+  const [syncedCount, setSyncedCount] = useState(0);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -64,8 +69,20 @@ export default function TeacherDashboard() {
   const handleSyncClasses = async () => {
     setGoogleLoading(true);
     try {
-      const res = await api.googleImportCourses();
-      const imported = (res.courses || []).filter(c => c.status === 'imported');
+      // Imports run in the background; poll the job until it finishes,
+      // showing courses as they land, but give up rather than spin forever.
+      let job = await api.googleImportCourses();
+      const deadline = Date.now() + SYNC_MAX_WAIT_MS;
+      while (job.status === 'pending' || job.status === 'running') {
+        if (Date.now() > deadline) {
+          throw new Error('Syncing is taking longer than expected. Please check back in a few minutes.');
+        }
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        job = await api.googleImportJob(job.job_id);
+        setSyncedCount((job.courses || []).length);
+      }
+      if (job.status === 'failed') throw new Error(job.error || 'Failed to sync classes.');
+      const imported = (job.courses || []).filter(c => c.status === 'imported');
       if (imported.length > 0) {
         alert(`Imported ${imported.length} new class${imported.length !== 1 ? 'es' : ''} from Google Classroom.`);
         api.listClassrooms().then(setClassrooms);
@@ -76,6 +93,7 @@ export default function TeacherDashboard() {
       alert(err.message || 'Failed to sync classes.');
     } finally {
       setGoogleLoading(false);
+      setSyncedCount(0);
     }
   };
 
@@ -124,7 +142,7 @@ export default function TeacherDashboard() {
               <div style={{ display: 'flex', gap: '.5rem', flexWrap: 'wrap' }}>
                 <button className="btn btn-primary" onClick={handleSyncClasses} disabled={googleLoading}
                   style={{ fontSize: '.8125rem', whiteSpace: 'nowrap' }}>
-                  {googleLoading ? 'Syncing...' : 'Sync Classes'}
+                  {googleLoading ? (syncedCount > 0 ? `Syncing... (${syncedCount} done)` : 'Syncing...') : 'Sync Classes'}
                 </button>
                 <button className="btn btn-secondary" onClick={handleDisconnectGoogle} disabled={googleLoading}
                   style={{ fontSize: '.8125rem', whiteSpace: 'nowrap' }}>
@@ -78,6 +78,7 @@ class ApiService {
   googleDisconnect() { return this.post('/google/disconnect', {}); }
   googleListCourses() { return this.get('/google/classroom/courses'); }
   googleImportCourses() { return this.post('/google/classroom/import-courses', {}); }
+  googleImportJob(jobId) { return this.get(`/google/classroom/import-jobs/${jobId}`); }
   googlePostAssignment(data) { return this.post('/google/classroom/post-assignment', data); }
   googleAssignmentLinks(assignmentId) { return this.get(`/google/classroom/assignment-links/${assignmentId}`); }
 }